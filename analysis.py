@@ -2,6 +2,8 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from plugin_runner import register_analysis
+
 def analyze_dataframe(df):
     top_contacts = df['Receiver'].value_counts().head(5)
     total_duration = df['Duration'].sum()
@@ -14,8 +16,9 @@ def plot_top_contacts(df):
     plt.title("Top 5 Contacts")
     return fig
 # analysis.py
+@register_analysis("run_my_analysis", version="2")
 def run_my_analysis(df):
-    # Your custom logic
-    df['Duration_Minutes'] = df['Duration'] / 60
+    # Your custom logic (returns a new frame, the input is left untouched)
+    df = df.assign(Duration_Minutes=df['Duration'] / 60)
     summary = df.describe()
     return summary, df
\ No newline at end of file
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+# Hourly activity anomaly detection. Events are binned into a (numbers x hours)
+# count matrix, and each cell is compared with a trailing baseline of the same
+# number's previous `window` hours: z = (count - mean) / max(std, min_std).
+# Everything is computed with whole-array NumPy operations, in row blocks small
+# enough to stay in cache, so memory stays bounded for millions of numbers.
+# bench_anomaly.py checks the 1M numbers x 30 days target.
+
+WINDOW_HOURS = 24 * 7
+BLOCK_ROWS = 4_096
+GROWTH = 1.25
+
+
+def rolling_zscores(counts, window=WINDOW_HOURS, min_std=1.0, start_col=0):
+    # Returns (z, mean) for columns start_col.. of `counts`, each cell scored against
+    # the `window` columns before it (fewer during the warm-up at the series start).
+    first = max(start_col - window, 0)
+    block = np.asarray(counts[:, first:], dtype=np.float64)
+    rows, width = block.shape
+    s = start_col - first  # first scored column, relative to `block`
+
+    # Cumulative sums with a leading zero column: sum(block[:, a:b]) = csum[:, b] - csum[:, a]
+    csum = np.zeros((rows, width + 1))
+    np.cumsum(block, axis=1, out=csum[:, 1:])
+    csum_sq = np.zeros((rows, width + 1))
+    np.cumsum(np.square(block), axis=1, out=csum_sq[:, 1:])
+
+    # Columns j < window see history 0..j-1 (warm-up); later ones exactly j-window..j-1.
+    # Both cases are plain slices, so no gathers are needed.
+    steady = min(max(window, s), width)
+    sums = np.empty((rows, width - s))
+    sums_sq = np.empty((rows, width - s))
+    n = np.full(width - s, float(window))
+    if steady > s:
+        sums[:, :steady - s] = csum[:, s:steady]
+        sums_sq[:, :steady - s] = csum_sq[:, s:steady]
+        n[:steady - s] = np.maximum(np.arange(s, steady), 1)
+    if width > steady:
+        np.subtract(csum[:, steady:width], csum[:, steady - window:width - window], out=sums[:, steady - s:])
+        np.subtract(csum_sq[:, steady:width], csum_sq[:, steady - window:width - window], out=sums_sq[:, steady - s:])
+
+    mean = np.divide(sums, n, out=sums)
+    std = np.divide(sums_sq, n, out=sums_sq)
+    std -= np.square(mean)
+    np.maximum(std, 0, out=std)
+    np.sqrt(std, out=std)
+    np.maximum(std, min_std, out=std)
+
+    z = block[:, s:] - mean
+    z /= std
+    if s == 0:
+        # The very first hour of a series has no history to compare against
+        z[:, 0] = 0
+    return z, mean
+
+
+class HourlyAnomalyDetector:
+    # Keeps the hourly count matrix between calls so new batches of records only
+    # extend it; score() then re-scores just the hours touched since the last run.
+
+    def __init__(self, window=WINDOW_HOURS, min_std=1.0, min_count=3):
+        self.window = window
+        self.min_std = min_std
+        self.min_count = min_count
+        self.numbers = pd.Index([], dtype=object)
+        self.start = None
+        self.n_rows = 0
+        self.n_cols = 0
+        # Over-allocated storage; `counts` is the used (n_rows x n_cols) corner of it
+        self._buf = np.zeros((0, 0), dtype=np.float32)
+        self.dirty_from = 0
+        self.scores = pd.DataFrame(columns=["number", "hour", "count", "baseline", "z_score"])
+
+    @property
+    def counts(self):
+        return self._buf[:self.n_rows, :self.n_cols]
+
+    def reserve(self, rows, cols, shift=0):
+        # Makes room for at least rows x cols without changing the used size; callers
+        # that know the expected volume (e.g. numbers x days to keep) can pre-allocate.
+        # `shift` moves existing columns right to make room for older data.
+        cap_rows, cap_cols = self._buf.shape
+        if shift or rows > cap_rows or cols > cap_cols:
+            grown = np.zeros((max(rows, cap_rows), max(cols, cap_cols)), dtype=np.float32)
+            grown[:self.n_rows, shift:shift + self.n_cols] = self.counts
+            self._buf = grown
+
+    def _resize(self, rows, cols, shift=0):
+        # Capacity grows geometrically, so a stream of small updates copies the matrix
+        # only O(log n) times
+        cap_rows, cap_cols = self._buf.shape
+        self.reserve(
+            rows if rows <= cap_rows else max(rows, int(cap_rows * GROWTH)),
+            cols if cols <= cap_cols else max(cols, int(cap_cols * GROWTH)),
+            shift,
+        )
+        self.n_rows, self.n_cols = rows, cols
+
+    def update(self, df, number_col="number", time_col="iso_time"):
+        times = pd.to_datetime(df[time_col], errors="coerce", utc=True)
+        valid = times.notna() & df[number_col].notna()
+        if not valid.any():
+            return
+        hours = times[valid].dt.floor("h")
+        numbers = df.loc[valid, number_col].astype(str)
+
+        # New numbers become rows, new hours columns on either side
+        new_numbers = pd.Index(numbers.unique()).difference(self.numbers)
+        self.numbers = self.numbers.append(new_numbers)
+        shift = 0
+        if self.start is None:
+            self.start = hours.min()
+        elif hours.min() < self.start:
+            shift = int((self.start - hours.min()) / pd.Timedelta(hours=1))
+            self.start = hours.min()
+        cols_needed = max(self.n_cols + shift, int((hours.max() - self.start) / pd.Timedelta(hours=1)) + 1)
+        self._resize(len(self.numbers), cols_needed, shift)
+
+        rows = self.numbers.get_indexer(numbers)
+        cols = ((hours - self.start) / pd.Timedelta(hours=1)).astype(int).to_numpy()
+        np.add.at(self._buf, (rows, cols), 1)
+
+        if shift:
+            self.dirty_from = 0
+        else:
+            self.dirty_from = min(self.dirty_from, int(cols.min()))
+
+    def score(self, top_k=100):
+        # Re-scores hours from dirty_from onwards and merges them into the ranking
+        counts = self.counts
+        if counts.size == 0 or self.dirty_from >= self.n_cols:
+            return self.scores
+        cand_z, cand_rows, cand_cols = [], [], []
+        for first_row in range(0, self.n_rows, BLOCK_ROWS):
+            block = counts[first_row:first_row + BLOCK_ROWS]
+            z, _ = rolling_zscores(block, self.window, self.min_std, self.dirty_from)
+
+            # Only hours with at least min_count events can rank; selecting those first
+            # keeps the partition small (partitioning a mostly-zero block is slow)
+            cells = np.flatnonzero(block[:, self.dirty_from:] >= self.min_count)
+            values = z.reshape(-1)[cells]
+            keep = values > 0
+            cells, values = cells[keep], values[keep]
+            if len(values) > top_k:
+                best = np.argpartition(values, -top_k)[-top_k:]
+                cells, values = cells[best], values[best]
+            r, c = np.divmod(cells, z.shape[1])
+            cand_z.append(values)
+            cand_rows.append(first_row + r)
+            cand_cols.append(self.dirty_from + c)
+
+        z_all = np.concatenate(cand_z)
+        order = np.argsort(z_all)[::-1][:top_k]
+        rows, cols = np.concatenate(cand_rows)[order], np.concatenate(cand_cols)[order]
+        found = pd.DataFrame({
+            "number": self.numbers[rows],
+            "hour": self.start + pd.to_timedelta(cols, unit="h"),
+            "count": counts[rows, cols].astype(int),
+            "baseline": self._baselines(rows, cols).round(2),
+            "z_score": z_all[order].round(2),
+        })
+
+        kept = self.scores[self.scores["hour"] < self.start + pd.Timedelta(hours=self.dirty_from)]
+        self.scores = (
+            pd.concat([kept, found], ignore_index=True)
+            .sort_values("z_score", ascending=False)
+            .head(top_k)
+            .reset_index(drop=True)
+        )
+        self.dirty_from = self.n_cols
+        return self.scores
+
+    def _baselines(self, rows, cols):
+        # Trailing mean for just the ranked cells, rather than keeping full mean blocks
+        baselines = np.empty(len(rows))
+        for i, (r, c) in enumerate(zip(rows, cols)):
+            history = self.counts[r, max(c - self.window, 0):c]
+            baselines[i] = history.mean() if len(history) else 0.0
+        return baselines
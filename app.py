@@ -4,11 +4,39 @@ import pandas as pd
 import json
 from mongo_utils import connect_mongo, insert_data, fetch_data_as_dataframe
 from analysis import analyze_dataframe, plot_top_contacts, run_my_analysis
+from plugin_runner import AnalysisRunner, dataset_hash
 
 st.title("📞 CDR Web Application")
 
 collection = connect_mongo()
 
+
+ANALYSIS_POLL_SECONDS = 2
+
+
+@st.cache_resource
+def get_analysis_runner():
+    # One worker pool and result cache shared by every session on this server
+    return AnalysisRunner()
+
+
+def show_analysis(df, data_hash, polling):
+    # Runs as a fragment that re-polls the future on a timer while the analysis is
+    # running, so the result shows up by itself without rerunning the whole page
+    future = get_analysis_runner().submit("run_my_analysis", df, data_hash=data_hash)
+    if not future.done():
+        st.info("⏳ Your analysis is running in the background. The result will appear here; the rest of the page stays usable.")
+    elif polling:
+        # Finished: rerun once so the fragment is drawn again without the timer
+        st.rerun()
+    elif future.exception() is not None:
+        st.error(f"❌ Analysis failed: {future.exception()}")
+    else:
+        summary, processed_df = future.result()
+        st.write("🔹 Summary:")
+        st.write(summary)
+
+
 uploaded_file = st.file_uploader("Upload your JSON file", type=["json"], key="json_uploader")
 
 if uploaded_file:
@@ -23,13 +51,17 @@ if uploaded_file:
 
 # Load from MongoDB for display and analysis
 if st.button("📥 Load Data from MongoDB"):
-    df = fetch_data_as_dataframe(collection)
+    st.session_state["mongo_df"] = fetch_data_as_dataframe(collection)
+    st.session_state["mongo_df_hash"] = dataset_hash(st.session_state["mongo_df"])
+
+if "mongo_df" in st.session_state:
+    df = st.session_state["mongo_df"]
     st.dataframe(df)
 
     st.subheader("📈 Analysis from MongoDB Data")
-    summary, processed_df = run_my_analysis(df)
-    st.write("🔹 Summary:")
-    st.write(summary)
+    data_hash = st.session_state["mongo_df_hash"]
+    running = not get_analysis_runner().submit("run_my_analysis", df, data_hash=data_hash).done()
+    st.fragment(show_analysis, run_every=ANALYSIS_POLL_SECONDS if running else None)(df, data_hash, running)
 
     st.subheader("📊 Top Contacts Visualization")
     st.pyplot(plot_top_contacts(df))
@@ -0,0 +1,66 @@
+# bench_anomaly.py
+# Checks the anomaly job's target: score 1M numbers x 30 days of hourly activity in
+# under a minute on one node, then absorb and re-score one more day incrementally.
+#   python bench_anomaly.py [--numbers 1000000] [--days 30] [--limit 60]
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from anomaly_utils import BLOCK_ROWS, HourlyAnomalyDetector
+
+
+def build_detector(n_numbers, days, seed=0):
+    # Fills the count matrix directly (block by block) instead of going through
+    # update(), which would need a DataFrame with hundreds of millions of events
+    rng = np.random.default_rng(seed)
+    detector = HourlyAnomalyDetector()
+    detector.numbers = pd.Index([f"+91{i:010d}" for i in range(n_numbers)], dtype=object)
+    detector.start = pd.Timestamp("2024-01-01", tz="UTC")
+    # Room for a further week up front, as a deployment expecting daily uploads would
+    detector.reserve(n_numbers, (days + 7) * 24)
+    detector.n_rows, detector.n_cols = n_numbers, days * 24
+    for first in range(0, n_numbers, BLOCK_ROWS):
+        block = detector.counts[first:first + BLOCK_ROWS]
+        block[:] = rng.poisson(0.4, size=block.shape)
+    # A few planted spikes that must come out on top
+    spikes = rng.choice(n_numbers, size=10, replace=False)
+    detector.counts[spikes, days * 24 - 5] += 60
+    return detector, set(detector.numbers[spikes])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--numbers", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--limit", type=float, default=60.0, help="seconds allowed for the full score")
+    args = parser.parse_args()
+
+    detector, planted = build_detector(args.numbers, args.days)
+
+    started = time.perf_counter()
+    scores = detector.score(top_k=100)
+    full_seconds = time.perf_counter() - started
+    found = planted <= set(scores["number"].head(len(planted)))
+    print(f"full score: {args.numbers} numbers x {args.days} days in {full_seconds:.1f}s "
+          f"(limit {args.limit:.0f}s), planted spikes ranked first: {found}")
+
+    # One more day of events for 5% of the numbers, then an incremental re-score
+    rng = np.random.default_rng(1)
+    active = rng.choice(args.numbers, size=args.numbers // 20, replace=False)
+    events = pd.DataFrame({
+        "number": detector.numbers[np.repeat(active, 4)],
+        "iso_time": detector.start + pd.to_timedelta(args.days * 24 + rng.integers(0, 24, len(active) * 4), unit="h"),
+    })
+    started = time.perf_counter()
+    detector.update(events)
+    detector.score(top_k=100)
+    print(f"incremental day: {len(events)} events absorbed and re-scored in {time.perf_counter() - started:.1f}s")
+
+    return 0 if full_seconds < args.limit and found else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
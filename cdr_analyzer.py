@@ -5,6 +5,9 @@ import matplotlib.pyplot as plt
 import plotly.express as px
 from collections import Counter, defaultdict
 from datetime import datetime
+from export_utils import iter_dataframe_chunks, render_export_controls
+from excel_utils import list_sheets, read_excel_streaming
+import duckdb_utils
 
 # --- Page Config ---
 st.set_page_config(page_title="📞 CDR Analyzer Toolkit", layout="wide")
@@ -13,9 +16,95 @@ st.set_page_config(page_title="📞 CDR Analyzer Toolkit", layout="wide")
 st.title("📞📩 Universal CDR Analyzer")
 st.markdown("Upload any supported file format (CSV, JSON, XLSX) to explore call/SMS log data dynamically.")
 
+# --- Data Source ---
+source = st.radio("📦 Data source", ["📤 Upload a file", duckdb_utils.SOURCE_LABEL], horizontal=True)
+
+if source == duckdb_utils.SOURCE_LABEL:
+    if not duckdb_utils.AVAILABLE:
+        st.error("DuckDB is not installed. Run `pip install duckdb` to analyze files larger than RAM.")
+        st.stop()
+
+    file_format = st.selectbox("File format", list(duckdb_utils.READERS.keys()))
+    paths = tuple(st.multiselect("📁 Files in the data folder", duckdb_utils.list_data_files(file_format)))
+
+    if not paths:
+        st.info("Please select the files to analyze. Files are read from the folder set in CDR_DATA_DIR.")
+        st.stop()
+
+    try:
+        # Text files are converted to Parquet on first use, which can take a while
+        with st.spinner("Preparing files..."):
+            db_source = duckdb_utils.open_source(paths, file_format)
+        columns = duckdb_utils.list_columns(db_source)
+        st.success(f"✅ Found {duckdb_utils.count_rows(db_source)} records and {len(columns)} columns.")
+        st.subheader("🔍 Data Preview (first 1000 rows)")
+        st.dataframe(duckdb_utils.fetch_rows(db_source, limit=1000), use_container_width=True)
+
+        # --- Filter By Number and Date ---
+        if "number" in columns and "iso_time" in columns:
+            selected_number = st.text_input("🔍 Enter number to filter")
+            min_date, max_date = duckdb_utils.date_range(db_source, "iso_time")
+            selected_date = st.date_input("📅 Select date to filter", min_value=min_date, max_value=max_date)
+
+            where, params = duckdb_utils.build_filter(columns, "number", selected_number or None, "iso_time", selected_date)
+            filtered_count = duckdb_utils.count_rows(db_source, where, params)
+
+            if not filtered_count:
+                st.warning("No matching records found.")
+            else:
+                st.success(f"✅ Found {filtered_count} records for {selected_number or 'all numbers'} on {selected_date}.")
+                st.dataframe(duckdb_utils.fetch_rows(db_source, where, params, limit=1000))
+
+                render_export_controls(
+                    lambda: duckdb_utils.iter_batches(db_source, where, params),
+                    key="db", signature=(db_source, where, params),
+                )
+
+                # Call Type Analysis
+                if "call_type" in columns:
+                    st.subheader("📞 Call Type Distribution")
+                    call_counts = duckdb_utils.top_n(db_source, "call_type", 20, where, params)
+                    fig1, ax1 = plt.subplots()
+                    ax1.pie(call_counts, labels=call_counts.index, autopct='%1.1f%%', startangle=140)
+                    ax1.axis('equal')
+                    st.pyplot(fig1)
+
+                # Hourly Analysis
+                st.subheader("⏱ Hourly Call Distribution")
+                hour_counts = duckdb_utils.hourly_counts(db_source, "iso_time", where, params)
+                if not hour_counts.empty:
+                    fig2 = plt.figure(figsize=(10, 4))
+                    plt.bar(hour_counts.index, hour_counts.values, color='skyblue')
+                    plt.xlabel("Hour")
+                    plt.ylabel("# Calls")
+                    plt.title("Call Activity by Hour")
+                    st.pyplot(fig2)
+
+                # Duration Histogram
+                if "duration_sec" in columns:
+                    counts, edges = duckdb_utils.histogram(db_source, "duration_sec", 10, where, params, scale=60)
+                    if counts:
+                        st.subheader("⏱ Call Duration Histogram")
+                        fig3 = plt.figure(figsize=(10, 4))
+                        plt.hist(edges[:-1], bins=edges, weights=counts, color='orchid', edgecolor='black')
+                        plt.xlabel("Duration (minutes)")
+                        plt.ylabel("# Calls")
+                        plt.title("Call Duration Distribution")
+                        plt.grid(True, axis='y', linestyle='--', alpha=0.6)
+                        st.pyplot(fig3)
+
+    except Exception as e:
+        st.error(f"❌ Failed to query {', '.join(paths)}: {e}")
+    st.stop()
+
 # --- File Upload ---
 uploaded_file = st.file_uploader("📤 Upload a call or SMS log", type=["json", "csv", "xlsx"])
 
+# Only the current workbook's parsed sheet is kept; anything else would just hold memory
+if not uploaded_file or not uploaded_file.name.lower().endswith(".xlsx"):
+    st.session_state.pop("xlsx_df", None)
+    st.session_state.pop("xlsx_cache_key", None)
+
 if uploaded_file:
     file_ext = uploaded_file.name.split(".")[-1].lower()
 
@@ -25,7 +114,23 @@ if uploaded_file:
             df = pd.DataFrame(data)
         elif file_ext == "csv":
             df = pd.read_csv(uploaded_file)
-        elif file_ext in ["xls", "xlsx"]:
+        elif file_ext == "xlsx":
+            sheets = list_sheets(uploaded_file)
+            sheet_name = st.selectbox("📑 Select sheet", sheets) if len(sheets) > 1 else sheets[0]
+            # Keep the parsed sheet across reruns so widget changes don't re-read the workbook
+            cache_key = (uploaded_file.file_id, sheet_name)
+            if st.session_state.get("xlsx_cache_key") != cache_key:
+                progress_bar = st.progress(0.0, text="Reading workbook...")
+
+                def report_progress(rows_read, total_rows):
+                    fraction = min(rows_read / total_rows, 1.0) if total_rows else 0.0
+                    progress_bar.progress(fraction, text=f"Read {rows_read} rows...")
+
+                st.session_state["xlsx_df"] = read_excel_streaming(uploaded_file, sheet_name, progress=report_progress)
+                st.session_state["xlsx_cache_key"] = cache_key
+                progress_bar.empty()
+            df = st.session_state["xlsx_df"].copy()
+        elif file_ext == "xls":
             df = pd.read_excel(uploaded_file)
         else:
             st.error("Unsupported file type.")
@@ -52,6 +157,12 @@ if uploaded_file:
                 st.success(f"✅ Found {len(filtered_df)} records for {selected_number} on {selected_date}.")
                 st.dataframe(filtered_df)
 
+                render_export_controls(
+                    lambda: iter_dataframe_chunks(filtered_df),
+                    key="upload", file_stem=f"{selected_number}_{selected_date}",
+                    signature=(uploaded_file.file_id, selected_number, selected_date),
+                )
+
                 # Call Type Analysis
                 if "call_type" in filtered_df.columns:
                     st.subheader("📞 Call Type Distribution")
@@ -4,6 +4,7 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import streamlit as st
 import pandas as pd
+from export_utils import iter_dataframe_chunks, render_export_controls
 
 # Page config
 st.set_page_config(page_title="📞 CDR Analyzer", layout="wide")
@@ -89,7 +90,14 @@ if uploaded_file and number_filter and date_filter:
 
             # Table
             st.subheader("📋 Filtered Call Records")
-            st.dataframe(pd.DataFrame(filtered_calls))
+            filtered_df = pd.DataFrame(filtered_calls)
+            st.dataframe(filtered_df)
+
+            render_export_controls(
+                lambda: iter_dataframe_chunks(filtered_df),
+                key="calls", file_stem=f"calls_{number_filter}_{target_date_str}",
+                signature=(uploaded_file.file_id, number_filter, target_date_str),
+            )
 
     except Exception as e:
         st.error(f"⚠ Error: {e}")
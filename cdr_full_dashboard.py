@@ -3,12 +3,117 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
 from datetime import datetime
+from export_utils import iter_dataframe_chunks, render_export_controls
+import duckdb_utils
 
 # ---------------- PAGE SETUP ----------------
 st.set_page_config(page_title="📊 CSV Data Analyzer", layout="wide")
 st.title("📊📂 Multi-CSV Data Analyzer Toolkit")
 st.markdown("Upload one or more CSV files to analyze, visualize, and filter your data.")
 
+# ---------------- DATA SOURCE ----------------
+source = st.radio("📦 Data source", ["📤 Upload CSV file(s)", duckdb_utils.SOURCE_LABEL], horizontal=True)
+
+if source == duckdb_utils.SOURCE_LABEL:
+    if not duckdb_utils.AVAILABLE:
+        st.error("❌ DuckDB is not installed. Run `pip install duckdb` to analyze files larger than RAM.")
+        st.stop()
+
+    st.markdown("Queries run directly over the files on disk; only result sets are loaded into memory.")
+    file_format = st.selectbox("File format", list(duckdb_utils.READERS.keys()))
+    paths = tuple(st.multiselect("📁 Files in the data folder", duckdb_utils.list_data_files(file_format)))
+
+    if not paths:
+        st.info("📂 Select the files to analyze. Files are read from the folder set in CDR_DATA_DIR.")
+        st.stop()
+
+    try:
+        # Text files are converted to Parquet on first use, which can take a while
+        with st.spinner("Preparing files..."):
+            db_source = duckdb_utils.open_source(paths, file_format)
+        columns = duckdb_utils.list_columns(db_source)
+        col_names = list(columns)
+
+        st.success(f"✅ Found {duckdb_utils.count_rows(db_source)} rows and {len(col_names)} columns.")
+        st.subheader("📄 Data Preview (first 1000 rows)")
+        st.dataframe(duckdb_utils.fetch_rows(db_source, limit=1000), use_container_width=True)
+
+        # ---------------- OPTIONAL FILTERING ----------------
+        st.subheader("🔍 Optional Filtering")
+
+        number_col = st.selectbox("📞 Select number column (or None)", ["None"] + col_names, key="db_number_col")
+        selected_number = None
+        if number_col != "None":
+            selected_number = st.text_input("Enter a number", key="db_sel_number") or None
+
+        date_col = st.selectbox("📅 Select date column (or None)", ["None"] + col_names, key="db_date_col")
+        selected_date = None
+        if date_col != "None":
+            min_date, max_date = duckdb_utils.date_range(db_source, date_col)
+            if min_date is None:
+                st.warning("⚠ Failed to parse date column. Check format.")
+            else:
+                selected_date = st.date_input(
+                    "Pick a date", min_value=min_date, max_value=max_date, key="db_sel_date"
+                )
+
+        where, params = duckdb_utils.build_filter(
+            columns, number_col if number_col != "None" else None, selected_number,
+            date_col if date_col != "None" else None, selected_date,
+        )
+        filtered_count = duckdb_utils.count_rows(db_source, where, params)
+        st.success(f"🔎 Filtered data: {filtered_count} rows")
+        st.dataframe(duckdb_utils.fetch_rows(db_source, where, params, limit=1000), use_container_width=True)
+
+        if filtered_count:
+            render_export_controls(
+                lambda: duckdb_utils.iter_batches(db_source, where, params),
+                key="db", signature=(db_source, where, params),
+            )
+
+        # ---------------- VISUALIZATIONS ----------------
+
+        st.subheader("📊 Plot Numeric Columns")
+        numeric_cols = duckdb_utils.numeric_columns(db_source)
+        selected_plot_cols = st.multiselect("Select numeric columns to visualize", numeric_cols, key="db_plot_cols")
+
+        if selected_plot_cols and filtered_count:
+            top_n = st.slider("Number of rows to plot", 5, max(5, min(100, filtered_count)), 20, key="db_topn")
+            plot_df = duckdb_utils.fetch_rows(db_source, where, params, limit=top_n)
+            melt_df = plot_df[selected_plot_cols].reset_index().melt(id_vars="index")
+            fig_bar = px.bar(melt_df, x="index", y="value", color="variable", barmode="group")
+            st.plotly_chart(fig_bar, use_container_width=True)
+
+        # Pie chart
+        st.subheader("🥧 Pie Chart for Categorical Column")
+        cat_cols = duckdb_utils.text_columns(db_source)
+        cat_col = st.selectbox("Select column for pie chart", ["None"] + cat_cols, key="db_pie_col")
+        if cat_col != "None":
+            counts = duckdb_utils.top_n(db_source, cat_col, 10, where, params)
+            fig_pie, ax = plt.subplots()
+            ax.pie(counts, labels=counts.index, autopct="%1.1f%%", startangle=140)
+            ax.axis("equal")
+            st.pyplot(fig_pie)
+
+        # Histogram
+        st.subheader("⏱ Histogram for a Numeric Column")
+        hist_col = st.selectbox("Select column for histogram", ["None"] + numeric_cols, key="db_hist_col")
+        if hist_col != "None":
+            counts, edges = duckdb_utils.histogram(db_source, hist_col, 10, where, params)
+            if not counts:
+                st.warning(f"⚠ No numeric values in {hist_col} for the current filter.")
+                st.stop()
+            fig_hist, ax2 = plt.subplots()
+            ax2.hist(edges[:-1], bins=edges, weights=counts, color='skyblue', edgecolor='black')
+            ax2.set_title(f"Distribution of {hist_col}")
+            ax2.set_xlabel(hist_col)
+            ax2.set_ylabel("Frequency")
+            st.pyplot(fig_hist)
+
+    except Exception as e:
+        st.error(f"❌ Error querying {', '.join(paths)}: {e}")
+    st.stop()
+
 # ---------------- FILE UPLOAD ----------------
 uploaded_files = st.file_uploader("📤 Upload CSV file(s)", type=["csv"], accept_multiple_files=True)
 
@@ -74,6 +179,12 @@ if uploaded_files:
             st.success(f"🔎 Filtered data: {len(filtered_df)} rows")
             st.dataframe(filtered_df, use_container_width=True)
 
+            render_export_controls(
+                lambda: iter_dataframe_chunks(filtered_df),
+                key=f"file_{idx}", file_stem=csv_file.name.rsplit(".", 1)[0] + "_filtered",
+                signature=(csv_file.file_id, number_col, selected_number, date_col, selected_date),
+            )
+
             # ---------------- VISUALIZATIONS ----------------
 
             st.subheader("📊 Plot Numeric Columns")
@@ -4,6 +4,7 @@ from collections import defaultdict, Counter
 from datetime import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
+from anomaly_utils import HourlyAnomalyDetector
 
 # ----------------- Analysis Functions -----------------
 
@@ -58,21 +59,53 @@ if call_file and sms_file:
     call_stats = analyze_calls(call_data)
     sms_stats = analyze_sms(sms_data)
 
-    # Show summary
-    st.subheader("📊 Call Summary")
-    st.json(call_stats)
-
-    st.subheader("📨 SMS Summary")
-    st.json(sms_stats)
-
-    # Plot hourly call activity
-    st.subheader("⏱ Call Activity by Hour")
-    call_hours = call_stats["call_distribution_by_hour"]
-    if call_hours:
-        hour_df = pd.DataFrame(list(call_hours.items()), columns=["Hour", "Calls"]).sort_values("Hour")
-        st.bar_chart(hour_df.set_index("Hour"))
-    else:
-        st.info("No valid call timestamps found.")
+    summary_tab, anomaly_tab = st.tabs(["📊 Summary", "🚨 Anomalies"])
+
+    with summary_tab:
+        # Show summary
+        st.subheader("📊 Call Summary")
+        st.json(call_stats)
+
+        st.subheader("📨 SMS Summary")
+        st.json(sms_stats)
+
+        # Plot hourly call activity
+        st.subheader("⏱ Call Activity by Hour")
+        call_hours = call_stats["call_distribution_by_hour"]
+        if call_hours:
+            hour_df = pd.DataFrame(list(call_hours.items()), columns=["Hour", "Calls"]).sort_values("Hour")
+            st.bar_chart(hour_df.set_index("Hour"))
+        else:
+            st.info("No valid call timestamps found.")
+
+    with anomaly_tab:
+        st.subheader("🚨 Unusual Hourly Activity")
+        st.markdown("Each number's hourly call + SMS count is compared with its own trailing 7-day baseline.")
+
+        # The detector lives in the session and only absorbs files it hasn't seen yet,
+        # so uploading the next day's logs extends the existing series.
+        detector = st.session_state.setdefault("anomaly_detector", HourlyAnomalyDetector())
+        seen = st.session_state.setdefault("anomaly_seen_files", set())
+        # Keyed by file_id, which is new for every upload: a new day's file may well
+        # have the same name and size as the previous one
+        for upload, records in ((call_file, call_data), (sms_file, sms_data)):
+            if upload.file_id in seen:
+                continue
+            activity = pd.DataFrame(records)
+            if {"number", "iso_time"} <= set(activity.columns):
+                detector.update(activity, "number", "iso_time")
+            seen.add(upload.file_id)
+
+        top_k = st.slider("Top outliers to show", min_value=10, max_value=500, value=50)
+        outliers = detector.score(top_k=500).head(top_k)
+        if outliers.empty:
+            st.info("No unusual activity found yet.")
+        else:
+            st.dataframe(outliers, use_container_width=True)
+        if st.button("🗑 Reset anomaly history"):
+            del st.session_state["anomaly_detector"]
+            del st.session_state["anomaly_seen_files"]
+            st.rerun()
 
 else:
     st.info("Please upload both Call and SMS JSON files.")
\ No newline at end of file
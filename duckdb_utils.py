@@ -0,0 +1,292 @@
+import glob
+import hashlib
+import os
+import uuid
+
+import streamlit as st
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Embedded DuckDB backend: queries run straight over the files on disk and only
+# the (small) result sets are materialised as pandas DataFrames.
+
+AVAILABLE = duckdb is not None
+SOURCE_LABEL = "🗄 Local files on server (DuckDB, larger than RAM)"
+
+# A single DuckDB instance serves every session on the server, so this cap bounds
+# all out-of-core queries together; spill files go to TEMP_DIR when set.
+MEMORY_LIMIT = os.environ.get("CDR_DUCKDB_MEMORY_LIMIT", "24GB")
+TEMP_DIR = os.environ.get("CDR_DUCKDB_TEMP_DIR")
+
+# Parquet copies of CSV/JSON sources (see open_source) and the number of query
+# results kept by st.cache_data; results are keyed by the files' mtimes and sizes.
+CACHE_DIR = os.environ.get(
+    "CDR_DUCKDB_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".duckdb_cache")
+)
+CACHE_ENTRIES = 256
+VIEW = "cdr"
+
+# Files are only ever read from under DATA_DIR: visitors pick from what is there
+# instead of typing paths, so nothing else on the server (or the network) is reachable.
+DATA_DIR = os.path.realpath(
+    os.environ.get("CDR_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+)
+
+READERS = {
+    "csv": "read_csv_auto",
+    "json": "read_json_auto",
+    "parquet": "read_parquet",
+}
+EXTENSIONS = {
+    "csv": (".csv", ".csv.gz"),
+    "json": (".json", ".jsonl", ".ndjson", ".json.gz"),
+    "parquet": (".parquet",),
+}
+
+
+def quote_ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def quote_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def connect_duckdb(db_path=":memory:", memory_limit=None, temp_dir=None):
+    con = duckdb.connect(db_path)
+    # Never fetch or load extensions on demand (e.g. httpfs for http:// or s3:// paths)
+    con.execute("SET autoinstall_known_extensions = false")
+    con.execute("SET autoload_known_extensions = false")
+    if memory_limit:
+        con.execute(f"SET memory_limit = {quote_literal(memory_limit)}")
+    if temp_dir:
+        con.execute(f"SET temp_directory = {quote_literal(temp_dir)}")
+    return con
+
+
+def register_files(con, view_name, paths, file_format="csv", temporary=False):
+    # `paths` may be a single path, a glob ("archive/*.csv") or a list of both
+    if isinstance(paths, str):
+        paths = [paths]
+    # Views can't take prepared parameters, so the path list is inlined as literals
+    path_list = "[" + ", ".join(quote_literal(p) for p in paths) + "]"
+    kind = "TEMP VIEW" if temporary else "VIEW"
+    con.execute(f"CREATE OR REPLACE {kind} {quote_ident(view_name)} AS SELECT * FROM {READERS[file_format]}({path_list})")
+    return view_name
+
+
+def _inside_data_dir(path):
+    real = os.path.realpath(path)
+    return os.path.commonpath([real, DATA_DIR]) == DATA_DIR
+
+
+def list_data_files(file_format):
+    # Paths (relative to DATA_DIR) of the files of one format, plus a "<folder>/*<ext>"
+    # entry for every folder holding several of them (e.g. a quarter of daily dumps)
+    choices = []
+    for root, dirs, files in os.walk(DATA_DIR):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        folder = os.path.relpath(root, DATA_DIR)
+        for ext in EXTENSIONS[file_format]:
+            matches = sorted(f for f in files if f.lower().endswith(ext) and _inside_data_dir(os.path.join(root, f)))
+            if len(matches) > 1:
+                choices.append(os.path.normpath(os.path.join(folder, "*" + ext)))
+            choices.extend(os.path.normpath(os.path.join(folder, f)) for f in matches)
+    return choices
+
+
+def resolve_paths(selection):
+    # Expands entries relative to DATA_DIR (files or globs) to real file paths and
+    # refuses anything that resolves outside it, including through symlinks
+    files = []
+    for entry in selection:
+        path = os.path.join(DATA_DIR, entry)
+        if any(c in entry for c in "*?["):
+            # Glob matches that lead outside (symlinks) are skipped, as in list_data_files
+            files.extend(os.path.realpath(p) for p in sorted(glob.glob(path)) if _inside_data_dir(p) and os.path.isfile(p))
+            continue
+        if not _inside_data_dir(path):
+            raise ValueError(f"{entry} is outside the data folder")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{entry} does not exist in the data folder")
+        files.append(os.path.realpath(path))
+    if not files:
+        raise FileNotFoundError("No files match the selection")
+    return list(dict.fromkeys(files))
+
+
+@st.cache_resource
+def shared_connection():
+    return connect_duckdb(memory_limit=MEMORY_LIMIT, temp_dir=TEMP_DIR)
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def _materialise(files, file_format, stamp):
+    # CSV/JSON are parsed once into a Parquet copy that every later query scans, so
+    # widget changes don't re-parse gigabytes of text. A new copy is made (and the
+    # old one dropped) when the source files' mtimes or sizes change.
+    folder = os.path.join(CACHE_DIR, _digest(files, file_format))
+    path = os.path.join(folder, _digest(stamp) + ".parquet")
+    if os.path.exists(path):
+        return path
+    os.makedirs(folder, exist_ok=True)
+    partial = f"{path}.{uuid.uuid4().hex}.tmp"
+    con = shared_connection().cursor()
+    try:
+        register_files(con, VIEW, list(files), file_format, temporary=True)
+        con.execute(f"COPY (SELECT * FROM {quote_ident(VIEW)}) TO {quote_literal(partial)} (FORMAT parquet)")
+        os.replace(partial, path)
+    finally:
+        con.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+    for name in os.listdir(folder):
+        if name.endswith(".parquet") and name != os.path.basename(path):
+            os.remove(os.path.join(folder, name))
+    return path
+
+
+def open_source(selection, file_format):
+    # Returns a hashable (files, format, mtimes/sizes) description of what to scan;
+    # the query helpers below take it instead of a connection so their results can
+    # be cached, and a changed file gives a new key.
+    files = tuple(resolve_paths(selection))
+    stamp = tuple((os.path.getmtime(f), os.path.getsize(f)) for f in files)
+    if file_format != "parquet":
+        files, file_format = (_materialise(files, file_format, stamp),), "parquet"
+    return files, file_format, stamp
+
+
+def _cursor(source):
+    # Each call gets its own cursor on the shared instance with a TEMP view, which
+    # is only visible to that cursor, so sessions never see each other's files.
+    files, file_format, _ = source
+    con = shared_connection().cursor()
+    register_files(con, VIEW, list(files), file_format, temporary=True)
+    return con
+
+
+def _query(source, query, params=()):
+    con = _cursor(source)
+    try:
+        return con.execute(query, list(params)).fetchall()
+    finally:
+        con.close()
+
+
+def _query_df(source, query, params=()):
+    con = _cursor(source)
+    try:
+        return con.execute(query, list(params)).df()
+    finally:
+        con.close()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def list_columns(source):
+    return {row[0]: row[1] for row in _query(source, f"DESCRIBE {quote_ident(VIEW)}")}
+
+
+def build_filter(columns, number_col=None, number=None, date_col=None, date=None):
+    # `columns` is list_columns() output. The typed number is cast to its column's own
+    # type, so "5" matches 5.0 in a DOUBLE column (the column cast to text is '5.0').
+    clauses, params = [], []
+    if number_col and number is not None:
+        dtype = columns[number_col]
+        if dtype == "VARCHAR":
+            clauses.append(f"{quote_ident(number_col)} = ?")
+        else:
+            clauses.append(f"{quote_ident(number_col)} = TRY_CAST(? AS {dtype})")
+        params.append(str(number).strip())
+    if date_col and date is not None:
+        clauses.append(f"CAST(TRY_CAST({quote_ident(date_col)} AS TIMESTAMP) AS DATE) = ?")
+        params.append(date)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, tuple(params)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def count_rows(source, where="", params=()):
+    return _query(source, f"SELECT COUNT(*) FROM {quote_ident(VIEW)}{where}", params)[0][0]
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def fetch_rows(source, where="", params=(), limit=1000):
+    return _query_df(source, f"SELECT * FROM {quote_ident(VIEW)}{where} LIMIT {int(limit)}", params)
+
+
+def iter_batches(source, where="", params=(), chunk_size=100_000):
+    # Streams the full result as Arrow record batches without materialising it. The
+    # returned reader also carries the result schema, even when no rows match.
+    result = _cursor(source).execute(f"SELECT * FROM {quote_ident(VIEW)}{where}", list(params))
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(chunk_size)
+    return result.fetch_record_batch(chunk_size)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def distinct_values(source, column, limit=10000):
+    col = quote_ident(column)
+    query = f"SELECT DISTINCT {col} FROM {quote_ident(VIEW)} WHERE {col} IS NOT NULL ORDER BY 1 LIMIT {int(limit)}"
+    return [row[0] for row in _query(source, query)]
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def date_range(source, column):
+    col = f"CAST(TRY_CAST({quote_ident(column)} AS TIMESTAMP) AS DATE)"
+    return _query(source, f"SELECT MIN({col}), MAX({col}) FROM {quote_ident(VIEW)}")[0]
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def top_n(source, column, n=10, where="", params=()):
+    col = quote_ident(column)
+    query = (
+        f"SELECT {col} AS value, COUNT(*) AS count FROM {quote_ident(VIEW)}{where} "
+        f"GROUP BY {col} ORDER BY count DESC LIMIT {int(n)}"
+    )
+    return _query_df(source, query, params).set_index("value")["count"]
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def hourly_counts(source, time_col, where="", params=()):
+    hour = f"HOUR(TRY_CAST({quote_ident(time_col)} AS TIMESTAMP))"
+    query = (
+        f"SELECT {hour} AS hour, COUNT(*) AS count FROM {quote_ident(VIEW)}{where} "
+        f"GROUP BY hour HAVING hour IS NOT NULL ORDER BY hour"
+    )
+    return _query_df(source, query, params).set_index("hour")["count"]
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def histogram(source, column, bins=10, where="", params=(), scale=1):
+    # Equal-width bins computed in SQL; returns (counts, edges) like numpy.histogram
+    value = f"TRY_CAST({quote_ident(column)} AS DOUBLE) / {float(scale)}"
+    base = f"SELECT {value} AS v FROM {quote_ident(VIEW)}{where}"
+    low, high = _query(source, f"SELECT MIN(v), MAX(v) FROM ({base})", params)[0]
+    if low is None:
+        return [], []
+    width = (high - low) / bins or 1
+    query = (
+        f"SELECT LEAST(FLOOR((v - {low}) / {width}), {bins - 1})::INTEGER AS bin, COUNT(*) AS count "
+        f"FROM ({base}) WHERE v IS NOT NULL GROUP BY bin"
+    )
+    found = dict(_query(source, query, params))
+    counts = [found.get(i, 0) for i in range(bins)]
+    edges = [low + i * width for i in range(bins + 1)]
+    return counts, edges
+
+
+def numeric_columns(source):
+    numeric_types = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                     "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL")
+    return [name for name, dtype in list_columns(source).items() if dtype.startswith(numeric_types)]
+
+
+def text_columns(source):
+    return [name for name, dtype in list_columns(source).items() if dtype == "VARCHAR"]
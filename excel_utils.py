@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Streaming XLSX reader. With python-calamine installed the sheet is parsed by its
+# Rust reader, which is several times faster than openpyxl (what pd.read_excel uses
+# by default); without it this falls back to openpyxl's read-only row iterator.
+# Rows are handed out in batches for progress reporting, collected into per-column
+# buffers and turned into a single DataFrame at the end.
+
+BATCH_SIZE = 50_000
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def list_sheets(file):
+    _rewind(file)
+    try:
+        if CalamineWorkbook is not None:
+            wb = CalamineWorkbook.from_filelike(file)
+            names = list(wb.sheet_names)
+            wb.close()
+            return names
+        from openpyxl import load_workbook
+        wb = load_workbook(file, read_only=True)
+        try:
+            return wb.sheetnames
+        finally:
+            wb.close()
+    finally:
+        _rewind(file)
+
+
+def _open_rows(file, sheet_name):
+    # Returns (row iterator, data rows below the header or None, close callback)
+    if CalamineWorkbook is not None:
+        wb = CalamineWorkbook.from_filelike(file)
+        sheet = wb.get_sheet_by_name(sheet_name) if sheet_name else wb.get_sheet_by_index(0)
+        return sheet.iter_rows(), max(sheet.height - 1, 0), wb.close
+
+    from openpyxl import load_workbook
+    wb = load_workbook(file, read_only=True, data_only=True)
+    ws = wb[sheet_name] if sheet_name else wb.active
+    total = ws.max_row - 1 if ws.max_row else None
+    # Some writers store a wrong dimension; reset so every row is actually read
+    ws.reset_dimensions()
+    return ws.iter_rows(values_only=True), total, wb.close
+
+
+def _header_names(cells):
+    # Same names as pd.read_excel: blank cells become "Unnamed: i" and repeats get
+    # ".1", ".2", ... (given names first, skipping suffixed names already in use)
+    names = []
+    for cell in cells:
+        if isinstance(cell, float) and cell.is_integer():
+            cell = int(cell)
+        names.append("" if cell is None else cell)
+    unnamed = [i for i, name in enumerate(names) if name == ""]
+    for i in unnamed:
+        names[i] = f"Unnamed: {i}"
+
+    counts = defaultdict(int)
+    for i in [i for i in range(len(names)) if i not in set(unnamed)] + unnamed:
+        name = original = names[i]
+        count = counts[name]
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts[name]
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def iter_excel_batches(file, sheet_name=None, batch_size=BATCH_SIZE, progress=None):
+    # Yields (header, rows) batches; `progress(rows_read, total_rows)` is called after
+    # each batch. total_rows comes from the sheet's stored dimension and may be None.
+    _rewind(file)
+    rows, total, close = _open_rows(file, sheet_name)
+    try:
+        first = next(rows, None)
+        if first is None:
+            return
+        header = _header_names(first)
+        width = len(header)
+
+        batch, done = [], 0
+        for row in rows:
+            if len(row) != width:
+                row = (tuple(row) + (None,) * width)[:width]
+            batch.append(row)
+            if len(batch) >= batch_size:
+                done += len(batch)
+                yield header, batch
+                batch = []
+                if progress:
+                    progress(done, total)
+        if batch:
+            done += len(batch)
+            yield header, batch
+        if progress:
+            progress(done, done)
+    finally:
+        close()
+        _rewind(file)
+
+
+def _clean_column(col):
+    # Matches what pd.read_excel returns: empty cells become NaN, dates become
+    # datetime64 and whole-number floats (Excel stores every number as a float) ints
+    if col.dtype == object:
+        col = col.replace("", None)
+        kind = infer_dtype(col, skipna=True)
+        if kind in ("date", "datetime"):
+            return pd.to_datetime(col)
+        col = col.infer_objects()
+    if col.dtype.kind == "f" and col.notna().all() and np.all(np.mod(col.to_numpy(), 1) == 0):
+        return col.astype(np.int64)
+    return col
+
+
+def read_excel_streaming(file, sheet_name=None, batch_size=BATCH_SIZE, progress=None):
+    columns = None
+    for header, batch in iter_excel_batches(file, sheet_name, batch_size, progress):
+        if columns is None:
+            columns = {name: [] for name in header}
+        for buffer, values in zip(columns.values(), zip(*batch)):
+            buffer.extend(values)
+    if columns is None:
+        return pd.DataFrame()
+    # Drop the empty rows spreadsheets often carry at the end (blank rows in between
+    # are kept, as pd.read_excel does), before they could turn int columns into floats
+    buffers = list(columns.values())
+    rows = len(buffers[0])
+    while rows and all(buffer[rows - 1] in (None, "") for buffer in buffers):
+        rows -= 1
+    return pd.DataFrame({
+        name: _clean_column(pd.Series(values[:rows], dtype=object)) for name, values in columns.items()
+    })
@@ -0,0 +1,363 @@
+import bz2
+import errno
+import os
+import re
+import time
+import uuid
+import zlib
+
+import pandas as pd
+import streamlit as st
+
+# Streaming export of filtered data: rows arrive as an iterator of DataFrame chunks
+# (or Arrow record batches) and are encoded (and compressed) chunk by chunk, so the
+# full output is never built in memory.
+
+FORMATS = {"CSV": "csv", "JSON Lines": "jsonl", "Parquet": "parquet"}
+STREAM_COMPRESSIONS = ["none", "gzip", "bz2"]
+PARQUET_COMPRESSIONS = ["snappy", "zstd", "gzip", "none"]
+CHUNK_SIZE = 100_000
+
+# Finished exports are served from disk by Streamlit's static file route
+# (server.enableStaticServing in .streamlit/config.toml). That route only serves the
+# `static` folder next to the app and refuses files over 200 MB, so every export is
+# written to a per-session folder under EXPORT_DIR and split into parts below that.
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+EXPORT_URL = "app/static/exports"
+PART_BYTES = 150 * 1024 * 1024
+EXPORT_TTL_SECONDS = 60 * 60
+CLEANUP_INTERVAL_SECONDS = 60
+
+_last_cleanup = 0.0
+
+
+class DataFrameChunks:
+    # Iterable of DataFrame slices that also exposes the Arrow schema of the whole
+    # frame, so every Parquet row group is written with the same, fully inferred types.
+
+    def __init__(self, df, chunk_size=CHUNK_SIZE):
+        self.df = df
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        # An empty frame still yields one chunk so the header/schema gets written
+        for start in range(0, max(len(self.df), 1), self.chunk_size):
+            yield self.df.iloc[start:start + self.chunk_size]
+
+    @property
+    def schema(self):
+        import pyarrow as pa
+        try:
+            return pa.Schema.from_pandas(self.df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        # Some object column mixes types (e.g. numbers and text): type the columns one
+        # by one and export the mixed ones as text
+        fields = []
+        for i, name in enumerate(self.df.columns):
+            try:
+                fields.append(pa.Schema.from_pandas(self.df.iloc[:, [i]], preserve_index=False).field(0))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                fields.append(pa.field(str(name), pa.string()))
+        return pa.schema(fields)
+
+
+def iter_dataframe_chunks(df, chunk_size=CHUNK_SIZE):
+    return DataFrameChunks(df, chunk_size)
+
+
+class _StreamBuffer:
+    # Write-only sink for pyarrow that hands back what was written since the last
+    # drain() while still reporting the absolute offset the Parquet footer needs.
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _to_pandas(chunk):
+    # Arrow record batches (DuckDB results) are converted one batch at a time
+    return chunk.to_pandas() if hasattr(chunk, "to_pandas") else chunk
+
+
+def _iter_text(chunks, fmt, schema=None):
+    wrote_any = False
+    for chunk in chunks:
+        chunk = _to_pandas(chunk)
+        if fmt == "csv":
+            text = chunk.to_csv(index=False, header=not wrote_any)
+        else:
+            text = chunk.to_json(orient="records", lines=True, date_format="iso")
+            if text and not text.endswith("\n"):
+                text += "\n"
+        wrote_any = True
+        yield text.encode("utf-8")
+    if not wrote_any and fmt == "csv" and schema is not None:
+        # No matching rows: still write the header line
+        yield (",".join(schema.names) + "\n").encode("utf-8")
+
+
+def _as_text(value):
+    if isinstance(value, str) or value is None:
+        return value
+    return None if pd.api.types.is_scalar(value) and pd.isna(value) else str(value)
+
+
+def _table_from_pandas(chunk, schema):
+    import pyarrow as pa
+    try:
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if schema is None:
+            raise
+    # Mixed object columns that the schema types as strings are written as text
+    chunk = chunk.copy(deep=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_string(field.type) and chunk.iloc[:, i].dtype == object:
+            chunk.isetitem(i, chunk.iloc[:, i].map(_as_text))
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def _iter_parquet(chunks, compression, schema=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _StreamBuffer()
+    writer = pq.ParquetWriter(sink, schema, compression=compression) if schema is not None else None
+    for chunk in chunks:
+        if isinstance(chunk, pa.RecordBatch):
+            table = pa.Table.from_batches([chunk])
+        else:
+            table = _table_from_pandas(chunk, schema)
+        if writer is None:
+            schema = table.schema
+            writer = pq.ParquetWriter(sink, schema, compression=compression)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export_bytes(chunks, fmt="csv", compression="none", schema=None):
+    # `schema` (a pyarrow.Schema) is used for Parquet types and for the CSV header of
+    # an empty result; sources with a `.schema` attribute get it passed automatically.
+    if schema is None:
+        schema = getattr(chunks, "schema", None)
+    if fmt == "parquet":
+        yield from _iter_parquet(chunks, compression, schema)
+        return
+
+    if compression == "gzip":
+        compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    elif compression == "bz2":
+        compressor = bz2.BZ2Compressor()
+    else:
+        compressor = None
+
+    for data in _iter_text(chunks, fmt, schema):
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+
+def clean_file_name(name):
+    # Keeps exported file names to a safe character set, whatever the user typed
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).strip("._") or "export"
+
+
+def export_file_name(stem, fmt, compression="none", part=None):
+    name = clean_file_name(stem)
+    if part is not None:
+        name += f".part{part:03d}"
+    name += f".{fmt}"
+    if fmt != "parquet" and compression != "none":
+        name += {"gzip": ".gz", "bz2": ".bz2"}[compression]
+    return name
+
+
+def write_export(source, directory, stem, fmt="csv", compression="none", part_bytes=PART_BYTES):
+    # Writes `source` into `directory`, starting a new self-contained file (with its
+    # own header or Parquet footer) whenever a part grows past `part_bytes`.
+    # Existing files are never overwritten. Returns (file names, row count).
+    final_path = os.path.join(directory, export_file_name(stem, fmt, compression))
+    if os.path.exists(final_path):
+        raise FileExistsError(errno.EEXIST, "Export already exists", final_path)
+
+    # A DataFrame's Arrow schema is only needed for Parquet (text exports always get
+    # at least one chunk from it), and inferring it can fail on mixed object columns
+    needs_schema = fmt == "parquet" or not isinstance(source, DataFrameChunks)
+    schema = getattr(source, "schema", None) if needs_schema else None
+    files, rows = [], 0
+    created = []
+    try:
+        chunks = iter(source)
+        pending = next(chunks, None)
+        while pending is not None or not files:
+            name = export_file_name(stem, fmt, compression, part=len(files) + 1)
+            with open(os.path.join(directory, name), "xb") as f:
+                created.append(f.name)
+
+                def part_chunks():
+                    nonlocal pending, rows
+                    while pending is not None:
+                        chunk, pending = pending, next(chunks, None)
+                        rows += len(chunk)
+                        yield chunk
+                        if f.tell() >= part_bytes:
+                            return
+
+                for data in iter_export_bytes(part_chunks(), fmt, compression, schema):
+                    f.write(data)
+            files.append(name)
+
+        if len(files) == 1:
+            # A single part keeps the plain name; link() refuses to replace an existing file
+            part_path = os.path.join(directory, files[0])
+            try:
+                os.link(part_path, final_path)
+            except FileExistsError:
+                raise
+            except OSError:
+                # Filesystem without hard links: rename once the name is known to be free
+                if os.path.exists(final_path):
+                    raise FileExistsError(errno.EEXIST, "Export already exists", final_path)
+                os.rename(part_path, final_path)
+            else:
+                os.remove(part_path)
+            files = [os.path.basename(final_path)]
+    except BaseException:
+        # Never leave a half-written export behind
+        for path in created:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return files, rows
+
+
+def cleanup_exports(max_age=EXPORT_TTL_SECONDS):
+    # Removes export files older than `max_age` seconds and session folders that have
+    # been empty for as long; throttled so it runs at most once per
+    # CLEANUP_INTERVAL_SECONDS. Other sessions may be writing meanwhile, so anything
+    # that vanishes or gains a file under us is left alone.
+    global _last_cleanup
+    now = time.time()
+    if now - _last_cleanup < CLEANUP_INTERVAL_SECONDS or not os.path.isdir(EXPORT_DIR):
+        return
+    _last_cleanup = now
+    for session_dir in os.scandir(EXPORT_DIR):
+        if not session_dir.is_dir():
+            continue
+        try:
+            entries = list(os.scandir(session_dir.path))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file() and now - entry.stat().st_mtime > max_age:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        # A folder's mtime changes whenever a file is added or removed, so a folder
+        # another session has just created (or written to) is kept; rmdir() also
+        # fails, leaving it alone, if a file appeared since the scan.
+        try:
+            if now - os.stat(session_dir.path).st_mtime > max_age:
+                os.rmdir(session_dir.path)
+        except OSError:
+            pass
+
+
+def _export_errors():
+    # What a failing export can raise: disk/IO errors, Arrow type conversion errors
+    # and, for DuckDB sources, query errors while the result is streamed
+    errors = [OSError, ValueError]
+    try:
+        import pyarrow as pa
+        errors.append(pa.ArrowException)
+    except ImportError:
+        pass
+    try:
+        import duckdb
+        errors.append(duckdb.Error)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def render_export_controls(make_chunks, key, file_stem="filtered_data", signature=None):
+    # `make_chunks` is called only when the user asks for an export; `signature`
+    # identifies the current filter so a stale export is never offered.
+    st.subheader("💾 Export Filtered Data")
+    cleanup_exports()
+    if not st.get_option("server.enableStaticServing"):
+        st.warning("⚠ Exports need `server.enableStaticServing = true` in .streamlit/config.toml.")
+        return
+
+    col1, col2 = st.columns(2)
+    fmt = FORMATS[col1.selectbox("Format", list(FORMATS), key=f"{key}_export_fmt")]
+    compressions = PARQUET_COMPRESSIONS if fmt == "parquet" else STREAM_COMPRESSIONS
+    compression = col2.selectbox("Compression", compressions, key=f"{key}_export_compression")
+
+    # Random per-session folder: links can't be guessed by other users of the server
+    token = st.session_state.setdefault("export_token", uuid.uuid4().hex)
+    session_dir = os.path.join(EXPORT_DIR, token)
+    state_key = f"{key}_export"
+
+    if st.button("📦 Prepare export", key=f"{key}_export_btn"):
+        previous = st.session_state.pop(state_key, None)
+        for name in previous["files"] if previous else []:
+            if os.path.exists(os.path.join(session_dir, name)):
+                os.remove(os.path.join(session_dir, name))
+
+        os.makedirs(session_dir, exist_ok=True)
+        # Mark the folder as in use so cleanup_exports() doesn't remove it while empty
+        os.utime(session_dir)
+        try:
+            with st.spinner("Writing export..."):
+                files, rows = write_export(make_chunks(), session_dir, file_stem, fmt, compression)
+        except FileExistsError as e:
+            st.error(f"❌ Export file already exists, not overwriting it: {os.path.basename(e.filename)}")
+        except _export_errors() as e:
+            st.error(f"❌ Export failed: {e}")
+        else:
+            st.session_state[state_key] = {"files": files, "rows": rows, "signature": signature}
+
+    export = st.session_state.get(state_key)
+    if not export or export["signature"] != signature:
+        return
+    missing = [name for name in export["files"] if not os.path.exists(os.path.join(session_dir, name))]
+    if missing:
+        st.info("⌛ The previous export has expired. Prepare it again to download.")
+        return
+
+    parts = f" in {len(export['files'])} parts" if len(export["files"]) > 1 else ""
+    st.success(f"✅ Exported {export['rows']} rows{parts}. Links stay valid for {EXPORT_TTL_SECONDS // 60} minutes.")
+    links = [
+        f'<a href="{EXPORT_URL}/{token}/{name}" download="{name}">⬇ {name}</a>'
+        for name in export["files"]
+    ]
+    st.markdown("<br>".join(links), unsafe_allow_html=True)
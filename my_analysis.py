@@ -1,7 +1,7 @@
 # my_analysis.py
 def run_my_analysis(df):
-    # Your custom logic
-    df['Duration_Minutes'] = df['Duration'] / 60
+    # Your custom logic (returns a new frame, the input is left untouched)
+    df = df.assign(Duration_Minutes=df['Duration'] / 60)
     summary = df.describe()
     return summary, df
 # Run your script on the backend
@@ -16,7 +16,7 @@ def run_my_analysis(df):
     if 'Duration' not in df.columns:
         raise KeyError("The 'Duration' column is missing. Check your JSON structure or MongoDB data.")
 
-    df['Duration_Minutes'] = df['Duration'] / 60
+    df = df.assign(Duration_Minutes=df['Duration'] / 60)
     summary = df.describe()
     return summary, df
 from st_aggrid import AgGrid, GridOptionsBuilder
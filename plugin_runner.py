@@ -0,0 +1,84 @@
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+# Registry of analysis plugins: name -> (function, version).
+# Bump the version whenever a function's logic changes so cached results are recomputed.
+ANALYSES = {}
+
+
+def register_analysis(name, version="1"):
+    def decorator(func):
+        ANALYSES[name] = (func, str(version))
+        return func
+    return decorator
+
+
+def dataset_hash(df):
+    try:
+        hashed = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Nested values (lists/dicts from JSON or MongoDB) aren't hashable as-is
+        hashed = pd.util.hash_pandas_object(df.astype(str), index=True)
+    digest = hashlib.sha1(hashed.values.tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+
+class AnalysisRunner:
+    # Runs registered analyses in a worker process pool. Each worker gets its own
+    # pickled snapshot of the frame, so a plugin can never modify the caller's data.
+    # Results are cached as futures keyed by (dataset hash, name, version, params),
+    # which also de-duplicates identical requests that are still running.
+
+    def __init__(self, max_workers=None, max_entries=32):
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.lock = threading.RLock()
+        self.executor = self._new_executor()
+
+    def _new_executor(self):
+        # "spawn" starts clean workers instead of forking the multithreaded server
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _evict_if_failed(self, key, future):
+        # Errors are never cached: the next submit for this key runs the analysis again
+        if future.cancelled() or future.exception() is not None:
+            with self.lock:
+                if self.cache.get(key) is future:
+                    del self.cache[key]
+
+    def submit(self, name, df, data_hash=None, **params):
+        if name not in ANALYSES:
+            raise KeyError(f"No analysis registered under '{name}'.")
+        func, version = ANALYSES[name]
+        key = (data_hash or dataset_hash(df), name, version, tuple(sorted(params.items())))
+
+        with self.lock:
+            future = self.cache.get(key)
+            # The done-callback may not have evicted a just-failed future yet
+            if future is not None and future.done() and (future.cancelled() or future.exception() is not None):
+                future = None
+            if future is None:
+                try:
+                    future = self.executor.submit(func, df, **params)
+                except BrokenProcessPool:
+                    # A worker died (OOM, segfault) and took the pool with it; start a fresh one
+                    self.executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self._new_executor()
+                    future = self.executor.submit(func, df, **params)
+                self.cache[key] = future
+                future.add_done_callback(lambda f, key=key: self._evict_if_failed(key, f))
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)